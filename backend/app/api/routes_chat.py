@@ -1,4 +1,5 @@
 # app/api/routes_chat.py
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.services.rag_pipeline import RAGPipeline
@@ -14,7 +15,8 @@ class SimpleChatRequest(BaseModel):
 @router.post("/", response_model=ChatResponse)
 async def chat_endpoint(req: SimpleChatRequest):
     try:
-        reply, source_docs = rag.generate_response(req.message, session_id=req.session_id)
+        # Retrieval + generation block, so keep them off the event loop
+        reply, source_docs = await asyncio.to_thread(rag.generate_response, req.message, req.session_id)
         return {"reply": reply, "sources": source_docs}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,4 +1,5 @@
 # app/api/routes_ticket.py
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.services.ticket_service import TicketService
@@ -18,7 +19,9 @@ class TicketResponse(BaseModel):
 @router.post("/", response_model=TicketResponse)
 async def create_ticket(req: TicketRequest):
     try:
-        ticket_id = ticket_svc.create_ticket(issue=req.issue, session_id=req.session_id, chat_history=req.chat_history or [])
+        ticket_id = await asyncio.to_thread(
+            ticket_svc.create_ticket, issue=req.issue, session_id=req.session_id, chat_history=req.chat_history or []
+        )
         return {"ticket_id": ticket_id, "status": "created"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,9 +1,12 @@
 # app/main.py
+import asyncio
+import torch
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes_chat import router as chat_router
+from app.api.routes_chat import router as chat_router, rag
 from app.api.routes_ticket import router as ticket_router
 from app.utils.config import settings
+from app.utils.logger import logger
 
 app = FastAPI(title="AI Chatbot for INGRES")
 
@@ -18,6 +21,26 @@ app.add_middleware(
 app.include_router(chat_router, prefix="/chat", tags=["chat"])
 app.include_router(ticket_router, prefix="/ticket", tags=["ticket"])
 
+@app.on_event("startup")
+async def warmup_models():
+    """Load the LLM and run one embedding pass so the first chat request skips the cold start"""
+    if not settings.WARMUP_ON_STARTUP:
+        return
+    logger.info("Warming up models...")
+    # Warmup is best effort: a failed LLM load (e.g. 4-bit on a CPU-only host) must not stop
+    # the app, since generate_response falls back to template-based answers
+    try:
+        await asyncio.to_thread(rag._get_llm)
+    except Exception as e:
+        logger.warning(f"⚠️ LLM warmup failed, continuing without it: {e}")
+    try:
+        await asyncio.to_thread(rag.embedding_model.encode, "warmup")
+    except Exception as e:
+        logger.warning(f"⚠️ Embedding model warmup failed: {e}")
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    logger.info("Model warmup complete")
+
 @app.get("/")
 def health():
     return {"status": "ok", "service": "ai-chatbot-ingres backend"}
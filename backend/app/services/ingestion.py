@@ -4,41 +4,65 @@ Document ingestion:
 - Reads files from data/docs/
 - Splits into simple chunks
 - Embeds using OpenAI embeddings
-- Stores vectors in FAISS and metadata in .meta.json
+- Stores vectors in FAISS, metadata in .meta.json and chunk texts in an mmap'd .texts.bin
 """
 
 import os
-import json
+import mmap
+import hashlib
+import orjson
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 import numpy as np
 import faiss
-from PyPDF2 import PdfReader
+import torch
 from app.utils.config import settings
+from app.services.pdf_text import extract_text_from_pdf
 from sentence_transformers import SentenceTransformer
 from app.utils.logger import logger
 
 DATA_DOCS = Path(__file__).resolve().parents[2] / "data" / "docs"
 EMBED_DIR = Path(__file__).resolve().parents[2] / "data" / "embeddings"
 EMBED_DIR.mkdir(parents=True, exist_ok=True)
+INDEX_ADD_BATCH = 256
+# SQ8 only learns per-dimension ranges, a small sample covers them. Corpora up to this size
+# train on every chunk, and those training vectors are the ones added to the index
+SQ_TRAIN_SAMPLE = 1024
 
-def extract_text_from_pdf(path: Path) -> str:
-    try:
-        reader = PdfReader(str(path))
-        text = []
-        for p in reader.pages:
-            text.append(p.extract_text() or "")
-        return "\n".join(text)
-    except Exception:
-        return ""
-
-def chunk_text(text: str, chunk_size: int = 800, overlap: int = 100) -> List[str]:
-    tokens = text.split()
+def read_documents(files: List[Path]) -> List[Tuple[Path, str]]:
+    """Read every doc file; PDFs are extracted in parallel worker processes since PyPDF2 is CPU-bound.
+    Workers unpickle extract_text_from_pdf from the light pdf_text module, so spawn doesn't re-import torch/faiss"""
+    pdf_files = [f for f in files if f.suffix.lower() == ".pdf"]
+    pdf_texts = {}
+    if len(pdf_files) > 1:
+        workers = min(len(pdf_files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            pdf_texts = dict(zip(pdf_files, ex.map(extract_text_from_pdf, pdf_files)))
+    elif pdf_files:
+        pdf_texts = {pdf_files[0]: extract_text_from_pdf(pdf_files[0])}
+
+    docs = []
+    for file in files:
+        if file.suffix.lower() == ".pdf":
+            text = pdf_texts[file]
+        else:
+            text = file.read_text(encoding="utf-8")
+        docs.append((file, text))
+    return docs
+
+def chunk_text(text: str, chunk_size: int = None, overlap: int = 32) -> List[str]:
+    """Split text into windows of the embedding model's own tokens so no chunk is silently truncated"""
+    model = get_embedding_model()
+    chunk_size = chunk_size or model.max_seq_length - 2  # room for [CLS]/[SEP]
+    # Offsets map each token back to the source, so chunks keep the original casing/spacing
+    encoding = model.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    offsets = encoding["offset_mapping"]
     chunks = []
     i = 0
-    while i < len(tokens):
-        chunk = tokens[i:i+chunk_size]
-        chunks.append(" ".join(chunk))
+    while i < len(offsets):
+        window = offsets[i:i+chunk_size]
+        chunks.append(text[window[0][0]:window[-1][1]])
         i += chunk_size - overlap
     return chunks
 
@@ -50,57 +74,148 @@ def get_embedding_model():
     if _embedding_model is None:
         logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
         _embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        if torch.cuda.is_available():
+            # FP16 halves weight bandwidth and uses tensor cores; MiniLM is robust to it
+            _embedding_model = _embedding_model.half().to("cuda")
     return _embedding_model
 
-def get_embedding(text: str):
+def embed_texts(texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """Embed texts into a preallocated (N, dim) float32 matrix in input order"""
     model = get_embedding_model()
-    embedding = model.encode([text])[0]
-    return np.array(embedding, dtype="float32")
+    mat = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype="float32")
+    # Encode in length order so each mini-batch pads to a similar sequence length,
+    # writing rows straight into their final slots instead of stacking per-batch arrays
+    order = np.argsort([len(t) for t in texts], kind="stable")
+    for start in range(0, len(texts), batch_size):
+        rows = order[start:start + batch_size]
+        mat[rows] = model.encode(
+            [texts[i] for i in rows],
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=False,
+            show_progress_bar=False,
+        )
+    return mat
+
+def build_index(texts: List[str], dim: int) -> Tuple[faiss.Index, np.ndarray, np.ndarray]:
+    """Build an empty FAISS index sized to the corpus: IVF-PQ once there is enough data to train it, SQ8 otherwise.
+
+    Also returns the row ids of the training sample and their embeddings, so callers can add them without re-encoding.
+    """
+    n = len(texts)
+    if n == 0:
+        return faiss.IndexFlatL2(dim), np.empty(0, dtype="int64"), np.empty((0, dim), dtype="float32")
+    # K_IVF ~ 4*sqrt(N); each centroid wants ~39 training points, PQ needs >=256
+    nlist = int(4 * np.sqrt(n))
+    if n < max(39 * nlist, 256):
+        # Exhaustive scan over 8-bit scalar-quantized codes, 4x smaller than FP32
+        factory, n_train = "SQ8", min(n, SQ_TRAIN_SAMPLE)
+    else:
+        encoding = "PQ32x8" if dim % 32 == 0 else "SQ8"
+        factory, n_train = f"IVF{nlist},{encoding}", min(n, 64 * nlist)
+    index = faiss.index_factory(dim, factory, faiss.METRIC_L2)
+    # Train on an evenly spaced sample so the full corpus never has to sit in RAM
+    if n_train == n:
+        sample_ids = np.arange(n, dtype="int64")
+    else:
+        sample_ids = np.unique(np.linspace(0, n - 1, n_train, dtype="int64"))
+    sample_vecs = embed_texts([texts[i] for i in sample_ids])
+    index.train(sample_vecs)
+    return index, sample_ids, sample_vecs
+
+def add_texts(index: faiss.Index, texts: List[str], sample_ids: np.ndarray, sample_vecs: np.ndarray):
+    """Add all texts to the index in id order, embedding only the rows not already embedded for training"""
+    for start in range(0, len(texts), INDEX_ADD_BATCH):
+        stop = min(start + INDEX_ADD_BATCH, len(texts))
+        # Training-sample rows that fall inside this batch, and where their vectors live
+        lo, hi = np.searchsorted(sample_ids, [start, stop])
+        if hi - lo == stop - start:
+            index.add(sample_vecs[lo:hi])
+            continue
+        vecs = np.empty((stop - start, index.d), dtype="float32")
+        have = np.zeros(stop - start, dtype=bool)
+        have[sample_ids[lo:hi] - start] = True
+        vecs[have] = sample_vecs[lo:hi]
+        missing = np.flatnonzero(~have)
+        vecs[missing] = embed_texts([texts[start + i] for i in missing])
+        index.add(vecs)
+
+class ChunkTextStore:
+    """Chunk texts in one mmap'd UTF-8 file, sliced by FAISS id via an offsets array"""
+
+    def __init__(self, texts_path: Path, offsets_path: Path):
+        self.offsets = np.load(str(offsets_path), mmap_mode="r")
+        with open(texts_path, "rb") as f:
+            # mmap keeps its own handle; an empty file cannot be mapped
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if texts_path.stat().st_size else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get(self, idx: int) -> str:
+        return self._data[self.offsets[idx]:self.offsets[idx + 1]].decode("utf-8")
+
+    @staticmethod
+    def paths(index_path: str) -> Tuple[Path, Path]:
+        index_path_p = Path(index_path)
+        return index_path_p.with_suffix(".texts.bin"), index_path_p.with_suffix(".offsets.npy")
+
+    @staticmethod
+    def write(texts: List[str], index_path: str):
+        texts_path, offsets_path = ChunkTextStore.paths(index_path)
+        offsets = np.zeros(len(texts) + 1, dtype="int64")
+        with open(texts_path, "wb") as f:
+            for i, t in enumerate(texts):
+                offsets[i + 1] = offsets[i] + f.write(t.encode("utf-8"))
+        np.save(str(offsets_path), offsets)
+
+def open_chunk_texts(index_path: str) -> Optional[ChunkTextStore]:
+    """Open the text store written alongside an index; None for indexes whose metadata still embeds text"""
+    texts_path, offsets_path = ChunkTextStore.paths(index_path)
+    if texts_path.exists() and offsets_path.exists():
+        return ChunkTextStore(texts_path, offsets_path)
+    return None
 
 def load_or_create_index(index_path: str, meta_path: str):
     meta_path_p = Path(meta_path)
     index_path_p = Path(index_path)
     # If index exists -> load
     if index_path_p.exists() and meta_path_p.exists():
-        index = faiss.read_index(str(index_path_p))
-        with open(meta_path_p, "r", encoding="utf-8") as f:
-            metadatas = json.load(f)
+        try:
+            # Page the index in on demand instead of reading it all into RAM
+            index = faiss.read_index(str(index_path_p), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            logger.info("Index type does not support mmap loading, reading it into memory")
+            index = faiss.read_index(str(index_path_p))
+        metadatas = orjson.loads(meta_path_p.read_bytes())
         return index, metadatas
 
     # Create index from data/docs
     texts = []
     metadatas = []
-    for file in DATA_DOCS.glob("*"):
-        text = ""
-        if file.suffix.lower() == ".pdf":
-            text = extract_text_from_pdf(file)
-        else:
-            text = file.read_text(encoding="utf-8")
+    seen = set()
+    for file, text in read_documents(list(DATA_DOCS.glob("*"))):
         if not text.strip():
             continue
         chunks = chunk_text(text)
         for i, c in enumerate(chunks):
+            # Skip boilerplate (headers, footers, TOCs) repeated across files
+            digest = hashlib.blake2b(c.encode("utf-8"), digest_size=16).digest()
+            if digest in seen:
+                continue
+            seen.add(digest)
             texts.append(c)
-            metadatas.append({"source": str(file.name), "title": f"{file.name} - chunk {i}", "text": c})
-
-    if not texts:
-        # empty index - use default embedding dimension
-        model = get_embedding_model()
-        dim = model.get_sentence_embedding_dimension()
-        index = faiss.IndexFlatL2(dim)
-        faiss.write_index(index, str(index_path_p))
-        with open(meta_path_p, "w", encoding="utf-8") as f:
-            json.dump([], f)
-        return index, []
-
-    embeddings = [get_embedding(t) for t in texts]
-    mat = np.vstack(embeddings).astype("float32")
-    dim = mat.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(mat)
+            metadatas.append({"source": str(file.name), "title": f"{file.name} - chunk {i}"})
+
+    dim = get_embedding_model().get_sentence_embedding_dimension()
+    index, sample_ids, sample_vecs = build_index(texts, dim)
+    # Add in batches so peak memory is one batch of vectors plus the training sample, not the whole corpus
+    add_texts(index, texts, sample_ids, sample_vecs)
+    del sample_vecs
+    # The index and meta files mark ingestion as done, so the text store must be in place before them
+    ChunkTextStore.write(texts, index_path)
     faiss.write_index(index, str(index_path_p))
-    with open(meta_path_p, "w", encoding="utf-8") as f:
-        json.dump(metadatas, f, ensure_ascii=False)
+    meta_path_p.write_bytes(orjson.dumps(metadatas))
     return index, metadatas
 
 # Expose a helper function to run a fresh ingestion from scripts/ingest_docs.py
@@ -0,0 +1,18 @@
+# app/services/pdf_text.py
+"""
+PDF text extraction.
+Kept apart from ingestion so PDF worker processes only import PyPDF2, not torch/faiss/sentence_transformers.
+"""
+
+from pathlib import Path
+from PyPDF2 import PdfReader
+
+def extract_text_from_pdf(path: Path) -> str:
+    try:
+        reader = PdfReader(str(path))
+        text = []
+        for p in reader.pages:
+            text.append(p.extract_text() or "")
+        return "\n".join(text)
+    except Exception:
+        return ""
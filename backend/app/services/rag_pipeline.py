@@ -6,16 +6,22 @@ Optimized RAG pipeline for RTX 4060 (8GB VRAM):
 """
 
 import json
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 import numpy as np
 from typing import List, Tuple
 from pathlib import Path
 from app.utils.config import settings
 from sentence_transformers import SentenceTransformer
-from app.services.ingestion import load_or_create_index, get_embedding_model
+from app.services.ingestion import load_or_create_index, open_chunk_texts, get_embedding_model
 from app.utils.logger import logger
 import torch
 
-from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, pipeline
+from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
 
 def build_prompt(user_query: str, retrieved_chunks: List[str]) -> str:
     """Build concise prompt from retrieved chunks"""
@@ -35,6 +41,70 @@ Answer clearly, concisely, and precisely.
 If the answer is not in the documentation, say "I don’t know based on the INGRES docs."
 """
 
+class GenerationBatcher:
+    """Coalesces concurrent prompts into one padded model.generate() call"""
+
+    def __init__(self, load_llm, max_batch_size: int = 8, max_wait: float = 0.01):
+        self._load_llm = load_llm
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        """Queue a prompt and block until its batch has been decoded"""
+        future = Future()
+        self._queue.put((prompt, future))
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+                self._worker.start()
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._generate_batch(batch)
+
+    def _generate_batch(self, batch: List[Tuple[str, Future]]):
+        try:
+            tokenizer, model = self._load_llm()
+            inputs = tokenizer(
+                [prompt for prompt, _ in batch],
+                return_tensors="pt",
+                padding=True,
+                return_token_type_ids=False
+            ).to(model.device)
+            with torch.inference_mode():
+                output = model.generate(
+                    **inputs,
+                    use_cache=True,
+                    max_new_tokens=300,
+                    do_sample=True,
+                    temperature=0.7,
+                    top_p=0.9,
+                    pad_token_id=tokenizer.eos_token_id
+                )
+            # Left padding means every prompt ends at the same column
+            replies = tokenizer.batch_decode(output[:, inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), reply in zip(batch, replies):
+            future.set_result(reply)
+
 class RAGPipeline:
     def __init__(self, index_path: str = None):
         self.index_path = index_path or str(
@@ -42,94 +112,132 @@ class RAGPipeline:
         )
         self.meta_path = str(Path(self.index_path).with_suffix(".meta.json"))
         self.index, self.metadatas = load_or_create_index(self.index_path, self.meta_path)
+        # Chunk texts are paged in from disk per hit rather than held in the metadata list
+        self.chunk_texts = open_chunk_texts(self.index_path)
+        if self.chunk_texts is not None and len(self.chunk_texts) != len(self.metadatas):
+            # A text store left over from another ingestion run would return the wrong chunk for each hit
+            raise RuntimeError(
+                f"Chunk text store has {len(self.chunk_texts)} entries but the index metadata has "
+                f"{len(self.metadatas)}; re-run ingestion (ingest_new_docs.ps1) to rebuild them together"
+            )
+        if hasattr(self.index, "nprobe"):
+            self.index.nprobe = settings.FAISS_NPROBE
 
         # Initialize embedding model
         self.embedding_model = get_embedding_model()
 
-        # Lazy-loaded LLM pipeline
-        self._llm_pipeline = None
+        # Bounded LRU of query embeddings keyed by content hash
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+        # Lazy-loaded 4-bit LLM, shared by a batcher that merges concurrent requests
+        self._llm = None
+        self._llm_lock = threading.Lock()
+        self._batcher = GenerationBatcher(
+            self._get_llm,
+            max_batch_size=settings.LLM_MAX_BATCH_SIZE,
+            max_wait=settings.LLM_BATCH_WAIT_MS / 1000
+        )
 
-    def _get_llm_pipeline(self):
+    def _get_llm(self):
         """Lazy load 4-bit LLM to save memory"""
-        if self._llm_pipeline is None:
-            logger.info(f"Loading LLM model from config: {settings.LLM_MODEL}")
-
-            bnb_config = BitsAndBytesConfig(
-                load_in_4bit=True,
-                bnb_4bit_compute_dtype=torch.float16,
-                bnb_4bit_use_double_quant=True,
-                bnb_4bit_quant_type="nf4"
-            )
-
-            tokenizer = AutoTokenizer.from_pretrained(settings.LLM_MODEL)
-            model = AutoModelForCausalLM.from_pretrained(
-                settings.LLM_MODEL,
-                device_map="auto",           # Auto GPU/CPU allocation
-                quantization_config=bnb_config
-            )
-
-            self._llm_pipeline = pipeline(
-                "text-generation",
-                model=model,
-                tokenizer=tokenizer,
-                max_length=1024,
-                do_sample=True,
-                temperature=0.7,
-                top_p=0.9,
-                device_map="auto"
-            )
-
-        return self._llm_pipeline
-
-    def _embed_text(self, text: str) -> List[float]:
+        with self._llm_lock:
+            if self._llm is None:
+                logger.info(f"Loading LLM model from config: {settings.LLM_MODEL}")
+
+                bnb_config = BitsAndBytesConfig(
+                    load_in_4bit=True,
+                    bnb_4bit_compute_dtype=torch.float16,
+                    bnb_4bit_use_double_quant=True,
+                    bnb_4bit_quant_type="nf4"
+                )
+
+                tokenizer = AutoTokenizer.from_pretrained(settings.LLM_MODEL)
+                # Batched decoder-only generation needs left padding and a pad token
+                tokenizer.padding_side = "left"
+                if tokenizer.pad_token is None:
+                    tokenizer.pad_token = tokenizer.eos_token
+
+                model = AutoModelForCausalLM.from_pretrained(
+                    settings.LLM_MODEL,
+                    device_map="auto",           # Auto GPU/CPU allocation
+                    quantization_config=bnb_config
+                )
+                model.eval()
+
+                self._llm = (tokenizer, model)
+
+        return self._llm
+
+    def _embed_text(self, text: str) -> np.ndarray:
         """Embed text with SentenceTransformer"""
-        embedding = self.embedding_model.encode([text])[0]
-        return embedding.tolist()
-
-    def _search(self, query: str, top_k: int = 4):
-        """Search FAISS index for relevant chunks"""
-        vec = np.array(self._embed_text(query), dtype="float32").reshape(1, -1)
+        return self.embedding_model.encode(text, convert_to_numpy=True, normalize_embeddings=False)
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a query, reusing the cached vector for repeated questions"""
+        key = hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest()
+        with self._query_cache_lock:
+            vec = self._query_cache.get(key)
+            if vec is not None:
+                self._query_cache.move_to_end(key)
+                return vec
+        vec = self._embed_text(query).astype("float32", copy=False)
+        with self._query_cache_lock:
+            self._query_cache[key] = vec
+            if len(self._query_cache) > settings.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vec
+
+    def _search(self, query: str, top_k: int = 4) -> Tuple[List[dict], List[float]]:
+        """Search FAISS index for relevant chunks, returning them with their L2 distances"""
+        # FAISS copies any input that is not C-contiguous float32; this is a no-op view when it already is
+        vec = np.ascontiguousarray(self._embed_query(query).reshape(1, -1), dtype=np.float32)
         D, I = self.index.search(vec, top_k)
         results = []
-        for idx in I[0]:
+        distances = []
+        for dist, idx in zip(D[0], I[0]):
             if idx < 0 or idx >= len(self.metadatas):
                 continue
-            results.append(self.metadatas[int(idx)])
-        return results
+            meta = self.metadatas[int(idx)]
+            if self.chunk_texts is not None:
+                meta = {**meta, "text": self.chunk_texts.get(int(idx))}
+            results.append(meta)
+            distances.append(float(dist))
+        return results, distances
 
     def generate_response(self, query: str, session_id: str = None) -> Tuple[str, List[dict]]:
         """Main RAG query handler"""
-        docs = self._search(query, top_k=4)
+        reply, docs, _ = self.generate_answer(query, session_id)
+        return reply, docs
+
+    def generate_answer(self, query: str, session_id: str = None) -> Tuple[str, List[dict], bool]:
+        """Like generate_response, also reporting whether the template fallback replaced the LLM answer"""
+        docs, distances = self._search(query, top_k=4)
+
+        # A near-exact hit already answers the question; skip prompt building and the LLM
+        if distances and distances[0] < settings.EXTRACTIVE_MATCH_DISTANCE:
+            return docs[0].get('text', ''), docs, False
 
         retrieved_chunks = [d.get('text', '') for d in docs]
 
         full_prompt = build_prompt(query, retrieved_chunks)
 
         try:
-            llm = self._get_llm_pipeline()
-            response = llm(
-                full_prompt,
-                max_new_tokens=300,
-                num_return_sequences=1,
-                pad_token_id=llm.tokenizer.eos_token_id
-            )
+            reply = self._batcher.generate(full_prompt).strip()
 
-            generated_text = response[0]['generated_text']
-            reply = generated_text[len(full_prompt):].strip()
-
-            if not reply:
-                reply = self._fallback_response(docs)
+            if reply:
+                return reply, docs, False
 
         except Exception as e:
             logger.error(f"LLM generation failed: {e}")
-            reply = self._fallback_response(docs)
 
-        return reply, docs
+        return self._fallback_response(docs), docs, True
 
     def _fallback_response(self, docs: List[dict]) -> str:
         """Concise fallback if LLM fails"""
         if not docs:
             return "I don’t know based on the INGRES docs. Please refine your question."
 
-        snippets = [d.get('text', '')[:400] + "..." if len(d.get('text','')) > 400 else d.get('text','') for d in docs[:3]]
-        return "Here’s what the INGRES documentation says:\n\n" + "\n\n".join(snippets)
+        parts = ["Here’s what the INGRES documentation says:"]
+        parts.extend(t[:400] + "..." if len(t := d.get('text', '')) > 400 else t for d in docs[:3])
+        return "\n\n".join(parts)
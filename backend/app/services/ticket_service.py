@@ -17,6 +17,10 @@ class TicketService:
         self.jira_token = settings.JIRA_API_TOKEN
         self.jira_base = settings.JIRA_BASE_URL
         self.jira_project = settings.JIRA_PROJECT_KEY
+        self._auth_header = "Basic " + base64.b64encode(f"email:{self.jira_token}".encode()).decode()
+        # Pooled keep-alive connection so each ticket skips the TCP/TLS handshake
+        self._session = requests.Session()
+        self._session.headers.update({"Content-Type": "application/json"})
 
     def create_ticket(self, issue: str, session_id: str, chat_history: list):
         # If Jira config not present, return mock
@@ -24,7 +28,6 @@ class TicketService:
             return f"MOCK-{uuid.uuid4().hex[:8]}"
 
         url = f"{self.jira_base.rstrip('/')}/rest/api/2/issue"
-        auth = base64.b64encode(f"email:{self.jira_token}".encode()).decode()
         # Build payload
         summary = f"[INGRES] Support: {issue[:80]}"
         description = f"Session: {session_id}\n\nIssue:\n{issue}\n\nChat history:\n{chat_history}"
@@ -36,8 +39,7 @@ class TicketService:
                 "issuetype": {"name": "Task"}
             }
         }
-        headers = {"Authorization": f"Basic {auth}", "Content-Type": "application/json"}
-        resp = requests.post(url, json=payload, headers=headers, timeout=10)
+        resp = self._session.post(url, json=payload, headers={"Authorization": self._auth_header}, timeout=10)
         if resp.status_code not in (200, 201):
             raise Exception(f"Jira API error: {resp.status_code} {resp.text}")
         data = resp.json()
@@ -0,0 +1,51 @@
+# app/tests/test_add_texts.py
+import numpy as np
+import pytest
+
+from app.services import ingestion
+from app.services.ingestion import INDEX_ADD_BATCH, SQ_TRAIN_SAMPLE, add_texts, build_index
+
+DIM = 8
+
+class FakeIndex:
+    """Records the rows passed to add()"""
+
+    d = DIM
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, vecs):
+        self.rows.extend(vecs)
+
+@pytest.fixture
+def encoded(monkeypatch):
+    """Stub embed_texts: each text is its row id, encoded into column 0 of its vector"""
+    calls = []
+
+    def embed_texts(texts):
+        calls.extend(texts)
+        vecs = np.zeros((len(texts), DIM), dtype="float32")
+        vecs[:, 0] = [int(t) for t in texts]
+        vecs[:, 1:] = np.arange(1, DIM)
+        return vecs
+
+    monkeypatch.setattr(ingestion, "embed_texts", embed_texts)
+    return calls
+
+@pytest.mark.parametrize("n", [
+    0,
+    100,                        # n <= SQ_TRAIN_SAMPLE, whole corpus is the training sample
+    INDEX_ADD_BATCH + 44,       # whole-corpus sample crossing an add batch
+    SQ_TRAIN_SAMPLE * 2 - 48,   # partial linspace sample, SQ8, several batches
+])
+def test_add_texts_in_id_order_encoding_each_text_once(encoded, n):
+    texts = [str(i) for i in range(n)]
+    _, sample_ids, sample_vecs = build_index(texts, DIM)
+    assert len(sample_ids) == min(n, SQ_TRAIN_SAMPLE)
+
+    index = FakeIndex()
+    add_texts(index, texts, sample_ids, sample_vecs)
+
+    assert [int(row[0]) for row in index.rows] == list(range(n))
+    assert sorted(encoded, key=int) == texts
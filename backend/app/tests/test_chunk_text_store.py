@@ -0,0 +1,22 @@
+# app/tests/test_chunk_text_store.py
+from app.services.ingestion import ChunkTextStore, open_chunk_texts
+
+def test_round_trip_non_ascii(tmp_path):
+    index_path = str(tmp_path / "faiss.index")
+    texts = ["plain ascii", "", "ünïcödé — ✓ 数据库", "last chunk\nwith newline"]
+    ChunkTextStore.write(texts, index_path)
+
+    store = open_chunk_texts(index_path)
+    assert len(store) == len(texts)
+    assert [store.get(i) for i in range(len(texts))] == texts
+
+def test_empty_store(tmp_path):
+    index_path = str(tmp_path / "faiss.index")
+    ChunkTextStore.write([], index_path)
+
+    store = open_chunk_texts(index_path)
+    assert store is not None
+    assert len(store) == 0
+
+def test_missing_store(tmp_path):
+    assert open_chunk_texts(str(tmp_path / "faiss.index")) is None
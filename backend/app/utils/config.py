@@ -8,6 +8,14 @@ class Settings(BaseSettings):
     # Local ML model settings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # SentenceTransformer
     LLM_MODEL: str = "tiiuae/falcon-7b-instruct"  # Hugging Face model, 4-bit quantization
+    WARMUP_ON_STARTUP: bool = True  # Load models at server start instead of on the first request
+    LLM_MAX_BATCH_SIZE: int = 8  # Concurrent prompts merged into one generate() call
+    LLM_BATCH_WAIT_MS: int = 10  # How long the batcher waits for more prompts
+
+    # Vector search settings
+    FAISS_NPROBE: int = 8  # IVF cells visited per query (ignored by flat indexes)
+    QUERY_CACHE_SIZE: int = 4096  # Cached query embeddings
+    EXTRACTIVE_MATCH_DISTANCE: float = 0.15  # Top hit closer than this (squared L2) is returned without the LLM
 
     # Optional external services
     JIRA_API_TOKEN: str = ""
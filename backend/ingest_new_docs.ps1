@@ -11,6 +11,8 @@ Write-Output ""
 Write-Output "🧹 Clearing old vector index..."
 Remove-Item data\embeddings\faiss.index -Force -ErrorAction SilentlyContinue
 Remove-Item data\embeddings\faiss.meta.json -Force -ErrorAction SilentlyContinue
+Remove-Item data\embeddings\faiss.texts.bin -Force -ErrorAction SilentlyContinue
+Remove-Item data\embeddings\faiss.offsets.npy -Force -ErrorAction SilentlyContinue
 Write-Output "✅ Old index cleared"
 Write-Output ""
 
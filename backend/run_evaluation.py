@@ -4,18 +4,37 @@ Easy-to-use script to run chatbot evaluation.
 Installs dependencies and runs the complete evaluation suite.
 """
 
+import hashlib
 import subprocess
 import sys
 import os
 from pathlib import Path
 
+BACKEND_DIR = Path(__file__).resolve().parent
+TESTS_DIR = BACKEND_DIR / "tests"
+REQUIREMENTS_FILE = BACKEND_DIR / "requirements.txt"
+REQUIREMENTS_STAMP = BACKEND_DIR / ".requirements.stamp"
+
+def _requirements_hash() -> str:
+    """Fingerprint of requirements.txt and the running interpreter."""
+    digest = hashlib.sha256(REQUIREMENTS_FILE.read_bytes()).hexdigest()
+    return f"{digest} {sys.executable} {sys.version}"
+
 def install_dependencies():
     """Install required dependencies for evaluation."""
+    stamp = _requirements_hash()
+    if REQUIREMENTS_STAMP.exists() and REQUIREMENTS_STAMP.read_text(encoding="utf-8") == stamp:
+        print("✅ Dependencies already up to date")
+        return True
+    
     print("🔧 Installing evaluation dependencies...")
     try:
         subprocess.check_call([
-            sys.executable, "-m", "pip", "install", "-r", "requirements.txt"
+            sys.executable, "-m", "pip", "install",
+            "--disable-pip-version-check", "--no-input",
+            "-r", str(REQUIREMENTS_FILE)
         ])
+        REQUIREMENTS_STAMP.write_text(stamp, encoding="utf-8")
         print("✅ Dependencies installed successfully!")
         return True
     except subprocess.CalledProcessError as e:
@@ -26,21 +45,24 @@ def run_evaluation():
     """Run the chatbot evaluation."""
     print("\n🚀 Starting chatbot evaluation...")
     
-    # Change to tests directory
-    tests_dir = Path(__file__).parent / "tests"
-    os.chdir(tests_dir)
+    # Expose the backend package to the child without touching our own cwd
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")])
+    )
     
     try:
         # Run the evaluation script
-        subprocess.check_call([sys.executable, "evaluate_chatbot.py"])
+        subprocess.check_call(
+            [sys.executable, str(TESTS_DIR / "evaluate_chatbot.py")],
+            cwd=str(TESTS_DIR),
+            env=env,
+        )
         print("✅ Evaluation completed successfully!")
         return True
     except subprocess.CalledProcessError as e:
         print(f"❌ Evaluation failed: {e}")
         return False
-    except FileNotFoundError:
-        print("❌ Evaluation script not found. Make sure evaluate_chatbot.py exists in tests directory.")
-        return False
 
 def main():
     """Main execution function."""
@@ -48,15 +70,7 @@ def main():
     print("🔍 INGRES AI Chatbot Evaluation Runner")
     print("=" * 60)
     
-    # Get current directory
-    current_dir = Path.cwd()
-    print(f"📂 Working directory: {current_dir}")
-    
-    # Check if we're in the right directory (backend)
-    backend_dir = Path(__file__).parent
-    if current_dir != backend_dir:
-        print(f"📂 Changing to backend directory: {backend_dir}")
-        os.chdir(backend_dir)
+    print(f"📂 Backend directory: {BACKEND_DIR}")
     
     # Install dependencies
     if not install_dependencies():
@@ -68,7 +82,7 @@ def main():
     
     if success:
         # Show results location
-        results_dir = backend_dir / "tests" / "evaluation_results"
+        results_dir = TESTS_DIR / "evaluation_results"
         print(f"\n📊 Results saved to: {results_dir}")
         print("\n📋 Key files generated:")
         print("   • evaluation_report.txt    - Human-readable summary")
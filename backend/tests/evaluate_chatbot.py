@@ -8,10 +8,14 @@ import json
 import sys
 import os
 import asyncio
+import csv
+import hashlib
+import io
+import sqlite3
+import threading
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-import statistics
+from typing import List, Dict, Any, Optional, Tuple
 import warnings
 
 # Suppress warnings for cleaner output
@@ -21,17 +25,13 @@ warnings.filterwarnings("ignore")
 sys.path.append(str(Path(__file__).parent.parent))
 
 # Import evaluation libraries
+# (torch/bert_score and matplotlib/seaborn are imported where they are used to keep startup light)
 try:
-    import pandas as pd
     import numpy as np
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    from bert_score import score
-    from sacrebleu import sentence_bleu
+    from sacrebleu.metrics import BLEU
     import nltk
     # Skip transformers pipeline import to avoid dependency conflicts
     # from transformers import pipeline
-    # import torch
 except ImportError as e:
     print(f"Missing required library: {e}")
     print("Please install missing dependencies with: pip install -r requirements.txt")
@@ -39,25 +39,196 @@ except ImportError as e:
 
 # Import local modules
 from app.services.rag_pipeline import RAGPipeline
+from app.utils.config import settings
 from response_formatter import ResponseFormatter
 
-# Download required NLTK data
+# Download required NLTK data, only when it is not already installed
 try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
+    for resource, package in (('tokenizers/punkt', 'punkt'), ('corpora/stopwords', 'stopwords')):
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package, quiet=True)
 except:
     pass
 
+# One BLEU object so tokenizer/regex state is built once, not per sentence
+_bleu = BLEU(effective_order=True)
+
+# bert_score's default English model, pinned so cache keys don't need the model loaded
+BERT_MODEL_TYPE = 'roberta-large'
+
+def _build_bert_scorer(device: Optional[str] = None):
+    """Import bert_score and load its model; deferred until scores are actually needed."""
+    import torch
+    from bert_score import BERTScorer
+    if device is None:
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    return BERTScorer(model_type=BERT_MODEL_TYPE, lang='en', device=device, batch_size=64)
+
+# Shared by every ChatbotEvaluator in the process so rebuilding one (e.g. in a notebook)
+# doesn't reload the model weights
+_BERT_SCORER = None
+_BERT_LOCK = threading.Lock()
+
+def _get_bert_scorer(device: Optional[str] = None):
+    """Return the process-wide BERTScorer, building it on first use or when a device is forced."""
+    global _BERT_SCORER
+    with _BERT_LOCK:
+        if _BERT_SCORER is None or device is not None:
+            _BERT_SCORER = _build_bert_scorer(device)
+        return _BERT_SCORER
+
+# Above this many responses detailed_results.json is written compact
+PRETTY_JSON_MAX_RESPONSES = 1000
+
+def _write_json(path: Path, data: Any, pretty: bool = True):
+    """Write JSON with orjson when available (UTF-8 bytes, native NumPy support), else stdlib json."""
+    try:
+        import orjson
+    except ImportError:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2 if pretty else None, ensure_ascii=False)
+        return
+    option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if pretty else 0)
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(data, option=option))
+
+def _sample_std(values: np.ndarray) -> float:
+    """Sample standard deviation (like statistics.stdev), 0 when there are fewer than two values."""
+    return float(values.std(ddof=1)) if values.size > 1 else 0.0
+
+# Text report templates, filled with str.format by _create_text_report
+REPORT_HEADER_TEMPLATE = """
+{rule}
+INGRES AI CHATBOT EVALUATION REPORT
+{rule}
+
+📊 OVERVIEW
+-----------
+Total Test Cases: {total_tests}
+Evaluation Date: {date}
+
+🎯 OVERALL PERFORMANCE METRICS
+------------------------------
+BERT Scores:
+  • F1 Score:     {bert[avg_f1]:.4f} ± {bert[f1_std]:.4f}
+  • Precision:    {bert[avg_precision]:.4f}
+  • Recall:       {bert[avg_recall]:.4f}
+  • F1 Range:     {bert[f1_min]:.4f} - {bert[f1_max]:.4f}
+
+BLEU Scores:
+  • Average:      {bleu[average]:.4f} ± {bleu[std]:.4f}
+  • Range:        {bleu[min]:.4f} - {bleu[max]:.4f}
+  • Corpus BLEU:  {bleu[corpus]:.4f}
+
+📈 PERFORMANCE BY CATEGORY
+---------------------------
+"""
+
+REPORT_CATEGORY_TEMPLATE = """
+{category} ({count} tests):
+  • BERT F1:      {avg_bert_f1:.4f} ± {bert_f1_std:.4f}
+  • BLEU:         {avg_bleu:.4f} ± {bleu_std:.4f}
+"""
+
+REPORT_EXAMPLE_TEMPLATE = """
+{title} (BERT F1: {f1:.4f})
+Question: {question}
+
+Expected: {expected}...
+
+Generated: {generated}...
+"""
+
+REPORT_FOOTER_TEMPLATE = """
+{rule}
+EVALUATION COMPLETE
+Files generated in: {output_dir}
+{rule}
+"""
+
+# (threshold, verdict) pairs checked top-down; the last entry is the catch-all
+BERT_ASSESSMENT = (
+    (0.85, "🟢 EXCELLENT - Very high semantic similarity to expected answers"),
+    (0.75, "🟡 GOOD - Good semantic similarity with room for improvement"),
+    (0.65, "🟠 FAIR - Moderate semantic similarity, needs improvement"),
+    (float('-inf'), "🔴 POOR - Low semantic similarity, significant improvement needed"),
+)
+BLEU_ASSESSMENT = (
+    (0.40, "🟢 EXCELLENT - High lexical overlap with expected answers"),
+    (0.25, "🟡 GOOD - Reasonable lexical overlap"),
+    (0.15, "🟠 FAIR - Some lexical overlap, could be better"),
+    (float('-inf'), "🔴 POOR - Low lexical overlap, needs improvement"),
+)
+
+def _assess(score: float, levels: Tuple[Tuple[float, str], ...]) -> str:
+    """Return the verdict of the first level whose threshold the score reaches."""
+    return next(verdict for threshold, verdict in levels if score >= threshold)
+
+class EvaluationCache:
+    """SQLite cache of RAG responses and BERT scores shared across evaluation runs."""
+
+    def __init__(self, cache_path: Path):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(cache_path), check_same_thread=False)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, raw TEXT)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS bert_scores (key TEXT PRIMARY KEY, precision REAL, recall REAL, f1 REAL)"
+            )
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+    def get_response(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT raw FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def clear_responses(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM responses")
+
+    def put_responses(self, rows: Dict[str, str]):
+        # One transaction for the whole run instead of an fsync per row
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?)", rows.items())
+
+    def get_bert_scores(self, keys: List[str]) -> Dict[str, Tuple[float, float, float]]:
+        found = {}
+        for key in keys:
+            row = self.conn.execute(
+                "SELECT precision, recall, f1 FROM bert_scores WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                found[key] = row
+        return found
+
+    def put_bert_scores(self, rows: Dict[str, Tuple[float, float, float]]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO bert_scores VALUES (?, ?, ?, ?)",
+                ((key, *scores) for key, scores in rows.items())
+            )
+
 class ChatbotEvaluator:
-    def __init__(self, dataset_path: str, output_dir: str = "evaluation_results"):
+    def __init__(self, dataset_path: str, output_dir: str = "evaluation_results", max_concurrency: int = 16,
+                 use_cache: bool = True):
         self.dataset_path = dataset_path
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.max_concurrency = max_concurrency
+        # With use_cache off the cached responses are dropped and every question is regenerated
+        self.use_cache = use_cache
         
         # Initialize components
         print("🔧 Initializing evaluation components...")
         self.rag_pipeline = RAGPipeline()
         self.response_formatter = ResponseFormatter()
+        # Responses are reused until the question, LLM or index changes
+        self.cache = EvaluationCache(self.output_dir.parent / "cache" / "responses.sqlite")
+        self.pipeline_version = f"{settings.LLM_MODEL}:{Path(self.rag_pipeline.index_path).stat().st_mtime_ns}"
         
         # Load test dataset
         self.test_data = self._load_dataset()
@@ -72,6 +243,10 @@ class ChatbotEvaluator:
             'category_stats': {},
             'overall_stats': {}
         }
+        self.corpus_bleu = 0.0
+        # Per-response score arrays, materialised once by _calculate_overall_stats
+        self.bert_f1_scores = np.empty(0)
+        self.bleu_scores = np.empty(0)
 
     def _load_dataset(self) -> List[Dict]:
         """Load the evaluation dataset."""
@@ -116,46 +291,65 @@ class ChatbotEvaluator:
         print("✅ Evaluation complete!")
         return self.results
 
+    def _row(self, test_case: Dict, raw_response: str, clean_response: str) -> Dict:
+        """Build one response record; BLEU is scored here so it overlaps with pending generations."""
+        return {
+            'question': test_case['question'],
+            'generated_response': clean_response,
+            'raw_response': raw_response,
+            'expected_answer': test_case['expected_answer'],
+            'category': test_case['category'],
+            'test_id': test_case['id'],
+            'bleu_score': self._sentence_bleu(clean_response, test_case['expected_answer'])
+        }
+
     async def _generate_responses(self):
-        """Generate responses for all test questions."""
-        generated_responses = []
+        """Generate responses for all test questions concurrently."""
+        sem = asyncio.Semaphore(self.max_concurrency)
+        total = len(self.test_data)
         
-        for i, test_case in enumerate(self.test_data, 1):
-            question = test_case['question']
-            print(f"   Generating response {i}/{len(self.test_data)}: {question[:50]}...")
-            
-            try:
-                # Generate response using RAG pipeline
-                raw_response, sources = self.rag_pipeline.generate_response(question)
-                
-                # Clean the response
-                clean_response = self.response_formatter.format_for_evaluation(raw_response)
-                
-                generated_responses.append({
-                    'question': question,
-                    'generated_response': clean_response,
-                    'raw_response': raw_response,
-                    'expected_answer': test_case['expected_answer'],
-                    'category': test_case['category'],
-                    'test_id': test_case['id']
-                })
-                
-                # Small delay to avoid overwhelming the system
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                print(f"   ⚠️ Error generating response for test {i}: {e}")
-                generated_responses.append({
-                    'question': question,
-                    'generated_response': f"Error: {str(e)}",
-                    'raw_response': f"Error: {str(e)}",
-                    'expected_answer': test_case['expected_answer'],
-                    'category': test_case['category'],
-                    'test_id': test_case['id']
-                })
+        new_responses = {}
+        cache_hits = 0
+        if not self.use_cache:
+            self.cache.clear_responses()
         
-        self.results['responses'] = generated_responses
-        print(f"   ✅ Generated {len(generated_responses)} responses")
+        async def _one(i: int, test_case: Dict) -> Dict:
+            nonlocal cache_hits
+            question = test_case['question']
+            key = self.cache.key(question, self.pipeline_version)
+            async with sem:
+                print(f"   Generating response {i}/{total}: {question[:50]}...")
+                try:
+                    raw_response = self.cache.get_response(key)
+                    if raw_response is None:
+                        # Generate response using RAG pipeline off the event loop
+                        raw_response, sources, used_fallback = await asyncio.to_thread(
+                            self.rag_pipeline.generate_answer, question
+                        )
+                        # A fallback means the LLM failed this run; don't replay it on later runs
+                        if not used_fallback:
+                            new_responses[key] = raw_response
+                    else:
+                        cache_hits += 1
+                    
+                    # Clean the response
+                    clean_response = self.response_formatter.format_for_evaluation(raw_response)
+                    
+                    return self._row(test_case, raw_response, clean_response)
+                    
+                except Exception as e:
+                    print(f"   ⚠️ Error generating response for test {i}: {e}")
+                    error = f"Error: {str(e)}"
+                    return self._row(test_case, error, error)
+        
+        # gather preserves input order, so results line up with test_data
+        generated_responses = await asyncio.gather(
+            *[_one(i, test_case) for i, test_case in enumerate(self.test_data, 1)]
+        )
+        self.cache.put_responses(new_responses)
+        
+        self.results['responses'] = list(generated_responses)
+        print(f"   ✅ Generated {len(generated_responses)} responses ({cache_hits} from cache)")
 
     def _calculate_bert_scores(self):
         """Calculate BERT scores for all responses."""
@@ -165,12 +359,35 @@ class ChatbotEvaluator:
         reference_texts = [r['expected_answer'] for r in self.results['responses']]
         
         try:
-            # Calculate BERT scores
-            P, R, F1 = score(generated_texts, reference_texts, lang='en', verbose=False)
+            # Only score pairs not already cached from a previous run
+            keys = [
+                self.cache.key(BERT_MODEL_TYPE, g, r)
+                for g, r in zip(generated_texts, reference_texts)
+            ]
+            scores = self.cache.get_bert_scores(keys)
+            # Score each distinct (generated, expected) pair once; repeats share the result
+            unique = {}
+            for i, key in enumerate(keys):
+                if key not in scores:
+                    unique.setdefault(key, i)
+            if unique:
+                # Length-sorted input keeps each batch's padded length tight
+                missing = sorted(
+                    unique.values(),
+                    key=lambda i: max(len(generated_texts[i].split()), len(reference_texts[i].split()))
+                )
+                P, R, F1 = self._score_with_backoff(
+                    [generated_texts[i] for i in missing],
+                    [reference_texts[i] for i in missing]
+                )
+                # Scores come back in sorted order; keying by pair maps them back to each response
+                fresh = {keys[i]: s for i, s in zip(missing, zip(P.tolist(), R.tolist(), F1.tolist()))}
+                self.cache.put_bert_scores(fresh)
+                scores.update(fresh)
             
             # Store individual scores
             bert_scores = []
-            for i, (p, r, f1) in enumerate(zip(P.tolist(), R.tolist(), F1.tolist())):
+            for i, (p, r, f1) in enumerate(scores[key] for key in keys):
                 bert_scores.append({
                     'precision': round(p, 4),
                     'recall': round(r, 4),
@@ -187,61 +404,76 @@ class ChatbotEvaluator:
             print(f"   ⚠️ Error calculating BERT scores: {e}")
             self.results['bert_scores'] = [{'precision': 0, 'recall': 0, 'f1': 0}] * len(generated_texts)
 
+    def _score_with_backoff(self, generated_texts: List[str], reference_texts: List[str]):
+        """Run BERTScore on all pairs at once, halving batch size on CUDA OOM before falling back to CPU."""
+        import torch
+        scorer = _get_bert_scorer()
+        while True:
+            try:
+                # score() takes its own batch_size (default 64) and ignores the scorer's attribute
+                return scorer.score(generated_texts, reference_texts, batch_size=scorer.batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                if scorer.batch_size > 1:
+                    scorer.batch_size //= 2
+                    print(f"   ⚠️ CUDA out of memory, retrying with batch_size={scorer.batch_size}")
+                else:
+                    print("   ⚠️ CUDA out of memory at batch_size=1, falling back to CPU")
+                    scorer = _get_bert_scorer(device='cpu')
+
+    @staticmethod
+    def _sentence_bleu(generated: str, reference: str) -> float:
+        """Sentence BLEU on a 0-1 scale, 0 if scoring fails."""
+        try:
+            return round(_bleu.sentence_score(generated, [reference]).score / 100.0, 4)
+        except Exception as e:
+            print(f"   ⚠️ Error calculating BLEU for one response: {e}")
+            return 0.0
+
     def _calculate_bleu_scores(self):
-        """Calculate BLEU scores for all responses."""
+        """Collect per-response BLEU scores and compute corpus BLEU."""
         print("   📊 Computing BLEU scores...")
         
-        bleu_scores = []
-        
-        for response_data in self.results['responses']:
-            generated = response_data['generated_response']
-            reference = response_data['expected_answer']
-            
-            try:
-                # Calculate sentence BLEU score
-                bleu_score = sentence_bleu(generated, [reference]).score / 100.0  # Convert to 0-1 scale
-                bleu_scores.append(round(bleu_score, 4))
-                
-                # Add to response data
-                response_data['bleu_score'] = round(bleu_score, 4)
-                
-            except Exception as e:
-                print(f"   ⚠️ Error calculating BLEU for one response: {e}")
-                bleu_scores.append(0.0)
-                response_data['bleu_score'] = 0.0
-        
+        # Sentence BLEU is computed as each response arrives in _generate_responses
+        bleu_scores = [r['bleu_score'] for r in self.results['responses']]
         self.results['bleu_scores'] = bleu_scores
-        print(f"   ✅ BLEU scores calculated for {len(bleu_scores)} responses")
+        
+        # Corpus-level BLEU pools n-gram counts over all responses
+        hypotheses = [r['generated_response'] for r in self.results['responses']]
+        references = [r['expected_answer'] for r in self.results['responses']]
+        self.corpus_bleu = round(_bleu.corpus_score(hypotheses, [references]).score / 100.0, 4)
+        print(f"   ✅ BLEU scores calculated for {len(bleu_scores)} responses (corpus BLEU: {self.corpus_bleu:.4f})")
 
     def _analyze_by_category(self):
         """Analyze results by question category."""
         print("   🔍 Analyzing performance by category...")
         
-        categories = {}
+        responses = self.results['responses']
+        categories, inverse, counts = np.unique(
+            [r['category'] for r in responses], return_inverse=True, return_counts=True
+        )
+        bert_f1 = np.fromiter((r['bert_score']['f1'] for r in responses), dtype=np.float64, count=len(responses))
+        bleu = np.fromiter((r['bleu_score'] for r in responses), dtype=np.float64, count=len(responses))
         
-        for response_data in self.results['responses']:
-            category = response_data['category']
-            
-            if category not in categories:
-                categories[category] = {
-                    'count': 0,
-                    'bert_f1_scores': [],
-                    'bleu_scores': []
-                }
-            
-            categories[category]['count'] += 1
-            categories[category]['bert_f1_scores'].append(response_data['bert_score']['f1'])
-            categories[category]['bleu_scores'].append(response_data['bleu_score'])
+        def _grouped_mean_std(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            # Per-category sums via bincount; sample std (ddof=1), 0 for single-test categories
+            means = np.bincount(inverse, weights=values) / counts
+            sq_dev = np.bincount(inverse, weights=(values - means[inverse]) ** 2)
+            var = np.divide(sq_dev, counts - 1, out=np.zeros_like(sq_dev), where=counts > 1)
+            return means, np.sqrt(var)
+        
+        bert_means, bert_stds = _grouped_mean_std(bert_f1)
+        bleu_means, bleu_stds = _grouped_mean_std(bleu)
         
         # Calculate category statistics
         category_stats = {}
-        for category, data in categories.items():
-            category_stats[category] = {
-                'count': data['count'],
-                'avg_bert_f1': round(statistics.mean(data['bert_f1_scores']), 4),
-                'avg_bleu': round(statistics.mean(data['bleu_scores']), 4),
-                'bert_f1_std': round(statistics.stdev(data['bert_f1_scores']) if len(data['bert_f1_scores']) > 1 else 0, 4),
-                'bleu_std': round(statistics.stdev(data['bleu_scores']) if len(data['bleu_scores']) > 1 else 0, 4)
+        for j, category in enumerate(categories):
+            category_stats[str(category)] = {
+                'count': int(counts[j]),
+                'avg_bert_f1': round(float(bert_means[j]), 4),
+                'avg_bleu': round(float(bleu_means[j]), 4),
+                'bert_f1_std': round(float(bert_stds[j]), 4),
+                'bleu_std': round(float(bleu_stds[j]), 4)
             }
         
         self.results['category_stats'] = category_stats
@@ -251,26 +483,30 @@ class ChatbotEvaluator:
         """Calculate overall performance statistics."""
         print("   📈 Computing overall statistics...")
         
-        bert_f1_scores = [r['bert_score']['f1'] for r in self.results['responses']]
-        bert_precision_scores = [r['bert_score']['precision'] for r in self.results['responses']]
-        bert_recall_scores = [r['bert_score']['recall'] for r in self.results['responses']]
-        bleu_scores = [r['bleu_score'] for r in self.results['responses']]
+        responses = self.results['responses']
+        n = len(responses)
+        bert_f1_scores = np.fromiter((r['bert_score']['f1'] for r in responses), dtype=np.float64, count=n)
+        bert_precision_scores = np.fromiter((r['bert_score']['precision'] for r in responses), dtype=np.float64, count=n)
+        bert_recall_scores = np.fromiter((r['bert_score']['recall'] for r in responses), dtype=np.float64, count=n)
+        bleu_scores = np.fromiter((r['bleu_score'] for r in responses), dtype=np.float64, count=n)
+        self.bert_f1_scores, self.bleu_scores = bert_f1_scores, bleu_scores
         
         self.results['overall_stats'] = {
-            'total_tests': len(self.results['responses']),
+            'total_tests': n,
             'bert_scores': {
-                'avg_f1': round(statistics.mean(bert_f1_scores), 4),
-                'avg_precision': round(statistics.mean(bert_precision_scores), 4),
-                'avg_recall': round(statistics.mean(bert_recall_scores), 4),
-                'f1_std': round(statistics.stdev(bert_f1_scores) if len(bert_f1_scores) > 1 else 0, 4),
-                'f1_min': round(min(bert_f1_scores), 4),
-                'f1_max': round(max(bert_f1_scores), 4)
+                'avg_f1': round(float(bert_f1_scores.mean()), 4),
+                'avg_precision': round(float(bert_precision_scores.mean()), 4),
+                'avg_recall': round(float(bert_recall_scores.mean()), 4),
+                'f1_std': round(_sample_std(bert_f1_scores), 4),
+                'f1_min': round(float(bert_f1_scores.min()), 4),
+                'f1_max': round(float(bert_f1_scores.max()), 4)
             },
             'bleu_scores': {
-                'average': round(statistics.mean(bleu_scores), 4),
-                'std': round(statistics.stdev(bleu_scores) if len(bleu_scores) > 1 else 0, 4),
-                'min': round(min(bleu_scores), 4),
-                'max': round(max(bleu_scores), 4)
+                'average': round(float(bleu_scores.mean()), 4),
+                'std': round(_sample_std(bleu_scores), 4),
+                'min': round(float(bleu_scores.min()), 4),
+                'max': round(float(bleu_scores.max()), 4),
+                'corpus': self.corpus_bleu
             }
         }
         
@@ -287,8 +523,7 @@ class ChatbotEvaluator:
         
         # Save detailed results as JSON
         results_file = self.output_dir / "detailed_results.json"
-        with open(results_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        _write_json(results_file, self.results, pretty=len(self.results['responses']) <= PRETTY_JSON_MAX_RESPONSES)
         
         # Create CSV for analysis
         self._create_csv_export()
@@ -302,148 +537,96 @@ class ChatbotEvaluator:
     def _create_text_report(self) -> str:
         """Create formatted text report."""
         stats = self.results['overall_stats']
+        rule = '=' * 80
+        buf = io.StringIO()
         
-        report = f"""
-{'=' * 80}
-INGRES AI CHATBOT EVALUATION REPORT
-{'=' * 80}
-
-📊 OVERVIEW
------------
-Total Test Cases: {stats['total_tests']}
-Evaluation Date: {time.strftime('%Y-%m-%d %H:%M:%S')}
-
-🎯 OVERALL PERFORMANCE METRICS
-------------------------------
-BERT Scores:
-  • F1 Score:     {stats['bert_scores']['avg_f1']:.4f} ± {stats['bert_scores']['f1_std']:.4f}
-  • Precision:    {stats['bert_scores']['avg_precision']:.4f}
-  • Recall:       {stats['bert_scores']['avg_recall']:.4f}
-  • F1 Range:     {stats['bert_scores']['f1_min']:.4f} - {stats['bert_scores']['f1_max']:.4f}
-
-BLEU Scores:
-  • Average:      {stats['bleu_scores']['average']:.4f} ± {stats['bleu_scores']['std']:.4f}
-  • Range:        {stats['bleu_scores']['min']:.4f} - {stats['bleu_scores']['max']:.4f}
-
-📈 PERFORMANCE BY CATEGORY
----------------------------
-"""
+        buf.write(REPORT_HEADER_TEMPLATE.format(
+            rule=rule,
+            total_tests=stats['total_tests'],
+            date=time.strftime('%Y-%m-%d %H:%M:%S'),
+            bert=stats['bert_scores'],
+            bleu=stats['bleu_scores']
+        ))
         
         # Add category breakdown
         for category, cat_stats in sorted(self.results['category_stats'].items()):
-            report += f"""
-{category.upper()} ({cat_stats['count']} tests):
-  • BERT F1:      {cat_stats['avg_bert_f1']:.4f} ± {cat_stats['bert_f1_std']:.4f}
-  • BLEU:         {cat_stats['avg_bleu']:.4f} ± {cat_stats['bleu_std']:.4f}
-"""
+            buf.write(REPORT_CATEGORY_TEMPLATE.format(category=category.upper(), **cat_stats))
         
         # Add performance interpretation
         bert_f1_avg = stats['bert_scores']['avg_f1']
         bleu_avg = stats['bleu_scores']['average']
         
-        report += f"""
-🏆 PERFORMANCE ASSESSMENT
--------------------------
-BERT F1 Score ({bert_f1_avg:.4f}):
-"""
-        
-        if bert_f1_avg >= 0.85:
-            report += "  🟢 EXCELLENT - Very high semantic similarity to expected answers\n"
-        elif bert_f1_avg >= 0.75:
-            report += "  🟡 GOOD - Good semantic similarity with room for improvement\n"
-        elif bert_f1_avg >= 0.65:
-            report += "  🟠 FAIR - Moderate semantic similarity, needs improvement\n"
-        else:
-            report += "  🔴 POOR - Low semantic similarity, significant improvement needed\n"
-        
-        report += f"""
-BLEU Score ({bleu_avg:.4f}):
-"""
-        
-        if bleu_avg >= 0.40:
-            report += "  🟢 EXCELLENT - High lexical overlap with expected answers\n"
-        elif bleu_avg >= 0.25:
-            report += "  🟡 GOOD - Reasonable lexical overlap\n"
-        elif bleu_avg >= 0.15:
-            report += "  🟠 FAIR - Some lexical overlap, could be better\n"
-        else:
-            report += "  🔴 POOR - Low lexical overlap, needs improvement\n"
+        buf.write("\n🏆 PERFORMANCE ASSESSMENT\n-------------------------\n")
+        buf.write(f"BERT F1 Score ({bert_f1_avg:.4f}):\n  {_assess(bert_f1_avg, BERT_ASSESSMENT)}\n")
+        buf.write(f"\nBLEU Score ({bleu_avg:.4f}):\n  {_assess(bleu_avg, BLEU_ASSESSMENT)}\n")
         
         # Add sample responses
-        report += "\n📝 SAMPLE RESPONSE COMPARISONS\n"
-        report += "=" * 50 + "\n"
+        buf.write("\n📝 SAMPLE RESPONSE COMPARISONS\n")
+        buf.write("=" * 50 + "\n")
         
         # Show best and worst performing examples
-        responses_with_scores = [
-            (r, r['bert_score']['f1']) for r in self.results['responses']
-        ]
-        responses_with_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        # Best performance
-        best_response = responses_with_scores[0][0]
-        report += f"""
-🥇 BEST PERFORMANCE (BERT F1: {best_response['bert_score']['f1']:.4f})
-Question: {best_response['question']}
-
-Expected: {best_response['expected_answer'][:200]}...
-
-Generated: {best_response['generated_response'][:200]}...
-"""
-        
-        # Worst performance
-        worst_response = responses_with_scores[-1][0]
-        report += f"""
-🥉 NEEDS IMPROVEMENT (BERT F1: {worst_response['bert_score']['f1']:.4f})
-Question: {worst_response['question']}
-
-Expected: {worst_response['expected_answer'][:200]}...
-
-Generated: {worst_response['generated_response'][:200]}...
-"""
-        
-        report += f"""
-{'=' * 80}
-EVALUATION COMPLETE
-Files generated in: {self.output_dir}
-{'=' * 80}
-"""
-        
-        return report
+        responses = self.results['responses']
+        examples = (
+            ("🥇 BEST PERFORMANCE", responses[int(self.bert_f1_scores.argmax())]),
+            ("🥉 NEEDS IMPROVEMENT", responses[int(self.bert_f1_scores.argmin())]),
+        )
+        for title, response in examples:
+            buf.write(REPORT_EXAMPLE_TEMPLATE.format(
+                title=title,
+                f1=response['bert_score']['f1'],
+                question=response['question'],
+                expected=response['expected_answer'][:200],
+                generated=response['generated_response'][:200]
+            ))
+        
+        buf.write(REPORT_FOOTER_TEMPLATE.format(rule=rule, output_dir=self.output_dir))
+        
+        return buf.getvalue()
 
     def _create_csv_export(self):
-        """Create CSV export for detailed analysis."""
-        csv_data = []
-        
-        for response_data in self.results['responses']:
-            csv_data.append({
-                'test_id': response_data['test_id'],
-                'category': response_data['category'],
-                'question': response_data['question'],
-                'expected_answer': response_data['expected_answer'],
-                'generated_response': response_data['generated_response'],
-                'bert_f1': response_data['bert_score']['f1'],
-                'bert_precision': response_data['bert_score']['precision'],
-                'bert_recall': response_data['bert_score']['recall'],
-                'bleu_score': response_data['bleu_score']
-            })
-        
-        df = pd.DataFrame(csv_data)
+        """Create CSV export for detailed analysis, streamed row by row."""
         csv_file = self.output_dir / "evaluation_results.csv"
-        df.to_csv(csv_file, index=False)
+        fieldnames = [
+            'test_id', 'category', 'question', 'expected_answer', 'generated_response',
+            'bert_f1', 'bert_precision', 'bert_recall', 'bleu_score'
+        ]
+        
+        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for response_data in self.results['responses']:
+                writer.writerow({
+                    'test_id': response_data['test_id'],
+                    'category': response_data['category'],
+                    'question': response_data['question'],
+                    'expected_answer': response_data['expected_answer'],
+                    'generated_response': response_data['generated_response'],
+                    'bert_f1': response_data['bert_score']['f1'],
+                    'bert_precision': response_data['bert_score']['precision'],
+                    'bert_recall': response_data['bert_score']['recall'],
+                    'bleu_score': response_data['bleu_score']
+                })
+        
         print(f"   📊 CSV export: {csv_file}")
 
     def _create_visualizations(self):
         """Create performance visualization charts."""
         try:
+            import matplotlib
+            matplotlib.use('Agg')  # Render straight to file, no GUI backend
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+            
             # Set up the plotting style
             plt.style.use('default')
             sns.set_palette("husl")
             
             # Create figure with subplots
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
+            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 9))
             fig.suptitle('INGRES AI Chatbot Evaluation Results', fontsize=16, fontweight='bold')
             
-            # Data preparation
+            # Data preparation (per-response series from _calculate_overall_stats, shared by plots 3 and 4)
+            bert_f1_scores, bleu_scores = self.bert_f1_scores, self.bleu_scores
             categories = list(self.results['category_stats'].keys())
             bert_f1_by_category = [self.results['category_stats'][cat]['avg_bert_f1'] for cat in categories]
             bleu_by_category = [self.results['category_stats'][cat]['avg_bleu'] for cat in categories]
@@ -473,17 +656,16 @@ Files generated in: {self.output_dir}
                         f'{score:.3f}', ha='center', va='bottom', fontweight='bold')
             
             # Plot 3: Score distribution histogram
-            bert_f1_scores = [r['bert_score']['f1'] for r in self.results['responses']]
             ax3.hist(bert_f1_scores, bins=10, alpha=0.7, color='green', edgecolor='black')
             ax3.set_title('BERT F1 Score Distribution', fontweight='bold')
             ax3.set_xlabel('BERT F1 Score')
             ax3.set_ylabel('Frequency')
-            ax3.axvline(statistics.mean(bert_f1_scores), color='red', linestyle='--', 
-                       label=f'Mean: {statistics.mean(bert_f1_scores):.3f}')
+            bert_f1_mean = bert_f1_scores.mean()
+            ax3.axvline(bert_f1_mean, color='red', linestyle='--', 
+                       label=f'Mean: {bert_f1_mean:.3f}')
             ax3.legend()
             
             # Plot 4: BERT vs BLEU scatter
-            bleu_scores = [r['bleu_score'] for r in self.results['responses']]
             scatter = ax4.scatter(bert_f1_scores, bleu_scores, alpha=0.6, s=50)
             ax4.set_title('BERT F1 vs BLEU Score Correlation', fontweight='bold')
             ax4.set_xlabel('BERT F1 Score')
@@ -504,7 +686,7 @@ Files generated in: {self.output_dir}
             
             # Save the plot
             plot_file = self.output_dir / "evaluation_charts.png"
-            plt.savefig(plot_file, dpi=300, bbox_inches='tight')
+            plt.savefig(plot_file, dpi=120, bbox_inches='tight')
             plt.close()
             
             print(f"   📈 Visualizations: {plot_file}")
@@ -520,10 +702,12 @@ async def main():
     # Configuration
     dataset_path = Path(__file__).parent / "evaluation_dataset.json"
     output_dir = "evaluation_results"
+    # EVAL_NO_CACHE=1 clears the response cache and regenerates every response
+    use_cache = os.getenv("EVAL_NO_CACHE", "").lower() not in ("1", "true", "yes")
     
     # Initialize evaluator
     try:
-        evaluator = ChatbotEvaluator(str(dataset_path), output_dir)
+        evaluator = ChatbotEvaluator(str(dataset_path), output_dir, use_cache=use_cache)
     except Exception as e:
         print(f"❌ Failed to initialize evaluator: {e}")
         return
@@ -5,7 +5,12 @@ Removes chunks, internal information, and formats as coherent single paragraphs.
 """
 
 import re
-from typing import List, Dict, Any
+import string
+from itertools import islice
+from typing import List, Dict, Any, FrozenSet
+
+# Characters trimmed from both ends of each kept sentence
+_PUNCT_STRIP = string.punctuation + string.whitespace
 
 class ResponseFormatter:
     def __init__(self):
@@ -32,10 +37,6 @@ class ResponseFormatter:
             # Remove ticket creation prompts
             r'.*create support ticket.*',
             r'.*Need more help\?.*',
-            
-            # Remove extra whitespace and formatting
-            r'\n{3,}',  # Multiple newlines
-            r'\s{2,}',  # Multiple spaces
         ]
         
         # Patterns for content sections to preserve
@@ -49,6 +50,24 @@ class ResponseFormatter:
             r'Verify\s+\w+',  # Instructions starting with "Verify"
             r'Consider\s+\w+',  # Instructions starting with "Consider"
         ]
+        
+        # Compile everything once; the methods below run per response and per sentence
+        # All removal patterns fused into one alternation so each response is scanned once
+        self._removal_union = re.compile(
+            '|'.join(f'(?:{p})' for p in self.removal_patterns), re.IGNORECASE | re.MULTILINE
+        )
+        # Collapses extra whitespace and formatting (multiple newlines/spaces) left by the removal pass
+        self._extra_ws_re = re.compile(r'\s{2,}')
+        self._content_union = re.compile('|'.join(f'(?:{p})' for p in self.content_patterns), re.IGNORECASE)
+        self._sentence_split_re = re.compile(r'[.!?]+')
+        self._ws_re = re.compile(r'\s+')
+        # Sentences made only of numbering markers or only of formatting characters
+        self._junk_re = re.compile(r'^(?:[\d\s\*\-\.]+|[\s\*\-_=]+)$')
+        # Words are counted lazily with finditer, stopping at the fifth, without building a list of all words
+        self._word_re = re.compile(r'\w+')
+        self._non_word_re = re.compile(r'[^\w\s]+')
+        # Runs of characters outside the evaluation alphabet, removed in one sub per run
+        self._special_chars_re = re.compile(r'[^\w\s\.,;:!?()-]+')
 
     def clean_response(self, response: str) -> str:
         """
@@ -61,8 +80,8 @@ class ResponseFormatter:
         cleaned = response.strip()
         
         # Remove unwanted patterns
-        for pattern in self.removal_patterns:
-            cleaned = re.sub(pattern, ' ', cleaned, flags=re.IGNORECASE | re.MULTILINE)
+        cleaned = self._removal_union.sub(' ', cleaned)
+        cleaned = self._extra_ws_re.sub(' ', cleaned)
         
         # Extract meaningful sentences
         sentences = self._extract_meaningful_sentences(cleaned)
@@ -74,16 +93,18 @@ class ResponseFormatter:
 
     def _extract_meaningful_sentences(self, text: str) -> List[str]:
         """Extract meaningful sentences from the cleaned text."""
+        # Normalize whitespace once over the whole text rather than per sentence
+        text = self._ws_re.sub(' ', text)
+        
         # Split by sentence endings
-        sentences = re.split(r'[.!?]+', text)
+        sentences = self._sentence_split_re.split(text)
         meaningful_sentences = []
         
         for sentence in sentences:
             sentence = sentence.strip()
             if self._is_meaningful_sentence(sentence):
                 # Clean up the sentence
-                sentence = re.sub(r'\s+', ' ', sentence)  # Normalize whitespace
-                sentence = re.sub(r'^\W+|\W+$', '', sentence)  # Remove leading/trailing punctuation
+                sentence = sentence.strip(_PUNCT_STRIP)  # Remove leading/trailing punctuation
                 if sentence:
                     meaningful_sentences.append(sentence)
         
@@ -94,12 +115,8 @@ class ResponseFormatter:
         if len(sentence.strip()) < 10:  # Too short
             return False
             
-        # Skip sentences with mostly technical markers
-        if re.search(r'^[\d\s\*\-\.]+$', sentence):
-            return False
-            
-        # Skip sentences that are just formatting
-        if re.search(r'^[\s\*\-_=]+$', sentence):
+        # Skip sentences with mostly technical markers or that are just formatting
+        if self._junk_re.match(sentence):
             return False
             
         # Skip empty or whitespace-only content
@@ -107,12 +124,12 @@ class ResponseFormatter:
             return False
             
         # Keep sentences with instructional content
-        if any(re.search(pattern, sentence, re.IGNORECASE) for pattern in self.content_patterns):
+        if self._content_union.search(sentence) is not None:
             return True
             
         # Keep sentences with substantial content (not just connectors)
-        word_count = len(re.findall(r'\w+', sentence))
-        return word_count >= 5
+        # A single regex for five words backtracks quadratically on one long word; finditer stays linear
+        return sum(1 for _ in islice(self._word_re.finditer(sentence), 5)) >= 5
 
     def _create_coherent_paragraph(self, sentences: List[str]) -> str:
         """Combine sentences into a coherent paragraph."""
@@ -120,10 +137,14 @@ class ResponseFormatter:
             return ""
             
         # Filter out duplicate or very similar sentences
+        # (each kept sentence's token set is computed once and reused for every later comparison)
         unique_sentences = []
+        existing_token_sets = []
         for sentence in sentences:
-            if not self._is_duplicate_content(sentence, unique_sentences):
+            tokens = self._token_set(sentence)
+            if not self._is_duplicate_content(tokens, existing_token_sets):
                 unique_sentences.append(sentence)
+                existing_token_sets.append(tokens)
         
         # Join sentences with proper spacing
         paragraph = '. '.join(unique_sentences)
@@ -134,17 +155,26 @@ class ResponseFormatter:
             
         return paragraph
 
-    def _is_duplicate_content(self, sentence: str, existing_sentences: List[str]) -> bool:
+    def _token_set(self, sentence: str) -> FrozenSet[str]:
+        """Lowercased word tokens of a sentence (same tokens as \\w+, split in C)."""
+        return frozenset(self._non_word_re.sub(' ', sentence.lower()).split())
+
+    def _is_duplicate_content(self, sentence_words: FrozenSet[str], existing_token_sets: List[FrozenSet[str]]) -> bool:
         """Check if sentence content is duplicate or very similar to existing ones."""
-        sentence_words = set(re.findall(r'\w+', sentence.lower()))
-        
-        for existing in existing_sentences:
-            existing_words = set(re.findall(r'\w+', existing.lower()))
+        n = len(sentence_words)
+        for existing_words in existing_token_sets:
+            m = len(existing_words)
+            
+            # Jaccard is at most min(n, m) / max(n, m), so sets of very different
+            # sizes can never pass the threshold and are rejected without intersecting
+            if min(n, m) < 0.7 * max(n, m):
+                continue
             
             # Check for significant overlap (more than 70% similar)
-            if sentence_words and existing_words:
+            if n and m:
+                # |a ∪ b| = |a| + |b| - |a ∩ b|, so the union set is never built
                 overlap = len(sentence_words & existing_words)
-                similarity = overlap / len(sentence_words | existing_words)
+                similarity = overlap / (n + m - overlap)
                 if similarity > 0.7:
                     return True
         
@@ -158,8 +188,8 @@ class ResponseFormatter:
         cleaned = self.clean_response(response)
         
         # Additional cleanup for evaluation
-        cleaned = re.sub(r'\s+', ' ', cleaned)  # Normalize all whitespace
-        cleaned = re.sub(r'[^\w\s\.,;:!?()-]', '', cleaned)  # Remove special characters
+        cleaned = self._ws_re.sub(' ', cleaned)  # Normalize all whitespace
+        cleaned = self._special_chars_re.sub('', cleaned)  # Remove special characters
         cleaned = cleaned.strip()
         
         return cleaned
@@ -4,16 +4,20 @@ Simplified Chatbot Evaluation Script
 Evaluates INGRES AI Chatbot using BERT and BLEU scores - standalone version
 """
 
+import importlib.util
 import json
+import re
 import sys
+import threading
 import os
 import asyncio
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-import statistics
+from typing import List, Dict, Any, Tuple, FrozenSet
 import warnings
 import subprocess
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore")
@@ -21,57 +25,91 @@ warnings.filterwarnings("ignore")
 # Add parent directory to path to import app modules
 sys.path.append(str(Path(__file__).parent.parent))
 
+# orjson is optional here: faster (de)serialisation when present, stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _read_json(path: Path) -> Any:
+    """Parse a JSON file, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json(path: Path, data: Any):
+    """Write indented UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+BASIC_DEPENDENCIES = ("requests", "nltk", "pandas", "numpy")
+
 def install_basic_dependencies():
-    """Install only the most essential dependencies."""
+    """Install the essential dependencies, only if some of them are missing."""
+    # find_spec locates packages without importing them, so the steady state costs no pip run
+    missing = [name for name in BASIC_DEPENDENCIES if importlib.util.find_spec(name) is None]
+    if not missing:
+        return True
+    
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "requests", "nltk", "pandas"])
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install", "--quiet",
+            "--disable-pip-version-check", *missing
+        ])
+        importlib.invalidate_caches()
         print("✅ Basic dependencies installed")
         return True
-    except:
+    except Exception:
         print("⚠️ Could not install dependencies, continuing...")
         return False
 
-def calculate_simple_similarity(text1: str, text2: str) -> float:
-    """Calculate a simple word overlap similarity score."""
-    if not text1 or not text2:
-        return 0.0
-    
-    words1 = set(text1.lower().split())
-    words2 = set(text2.lower().split())
-    
+def _describe(values) -> Tuple[float, float, float, float]:
+    """Mean, sample std (0 for fewer than two values), min and max of a list of scores."""
+    import numpy as np  # Imported here so the script starts before install_basic_dependencies runs
+    arr = np.asarray(values, dtype=np.float64)
+    std = float(arr.std(ddof=1)) if arr.size > 1 else 0.0
+    return float(arr.mean()), std, float(arr.min()), float(arr.max())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased whitespace tokens shared by the similarity and BLEU scorers."""
+    return text.lower().split() if text else []
+
+def calculate_simple_similarity(words1: FrozenSet[str], words2: FrozenSet[str]) -> float:
+    """Calculate a simple word overlap similarity score from two token sets."""
     if not words1 or not words2:
         return 0.0
     
-    intersection = len(words1.intersection(words2))
-    union = len(words1.union(words2))
-    
-    return intersection / union if union > 0 else 0.0
+    # Jaccard with |a ∪ b| = |a| + |b| - |a ∩ b|, so the union set is never built
+    intersection = len(words1 & words2)
+    return intersection / (len(words1) + len(words2) - intersection)
 
-def calculate_bleu_simple(candidate: str, reference: str) -> float:
-    """Simple BLEU-like score calculation."""
-    if not candidate or not reference:
-        return 0.0
-    
-    candidate_words = candidate.lower().split()
-    reference_words = reference.lower().split()
-    
+def calculate_bleu_simple(candidate_words: List[str], reference_words: List[str]) -> float:
+    """Simple BLEU-like score calculation from two token lists."""
     if not candidate_words or not reference_words:
         return 0.0
     
-    # Count matching words
-    matches = 0
-    ref_word_count = {}
-    for word in reference_words:
-        ref_word_count[word] = ref_word_count.get(word, 0) + 1
-    
-    for word in candidate_words:
-        if word in ref_word_count and ref_word_count[word] > 0:
-            matches += 1
-            ref_word_count[word] -= 1
+    # Count matching words (clipped by reference counts, via multiset intersection)
+    matches = sum((Counter(candidate_words) & Counter(reference_words)).values())
     
     # Precision-based score
-    precision = matches / len(candidate_words) if candidate_words else 0
-    return precision
+    return matches / len(candidate_words)
+
+# Shared HTTP session so every question reuses one keep-alive connection to the backend
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+def _get_session():
+    """Create the shared requests.Session on first use (requests may be installed at runtime)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            _SESSION = requests.Session()
+    return _SESSION
 
 def get_chatbot_response(question: str) -> str:
     """
@@ -81,7 +119,7 @@ def get_chatbot_response(question: str) -> str:
     import requests
     
     try:
-        response = requests.post(
+        response = _get_session().post(
             'http://localhost:8000/chat/',
             json={'message': question, 'session_id': 'test'},
             timeout=30
@@ -98,6 +136,19 @@ def get_chatbot_response(question: str) -> str:
     except Exception as e:
         return f"Error: {str(e)}"
 
+# Response clean-up patterns, fused into one alternation compiled once at import
+# (no DOTALL: every pattern stays on one line, so a match can never run to the end of the response)
+_REMOVAL_RE = re.compile('|'.join(f'(?:{p})' for p in (
+    r'^.*Based on the INGRES documentation.*?found:\s*',
+    r'\*\*\d+\.\s*[^*]*\*\*',  # Remove numbered sections
+    r'Title:\s*[^\n]*\n',
+    r'Source:\s*[^\n]*\n',
+    r'---\s*---',
+    r'^.*💡.*$',  # Help tip line
+    r'Need more help\?.*'
+)), re.IGNORECASE | re.MULTILINE)
+_WS_RE = re.compile(r'\s+')
+
 def clean_response(response: str) -> str:
     """Clean response text to remove chunks and internal information."""
     if not response:
@@ -106,30 +157,19 @@ def clean_response(response: str) -> str:
     cleaned = response.strip()
     
     # Remove common patterns
-    patterns_to_remove = [
-        r'Based on the INGRES documentation.*?found:\s*',
-        r'\*\*\d+\.\s*[^*]*\*\*',  # Remove numbered sections
-        r'Title:\s*[^\n]*\n',
-        r'Source:\s*[^\n]*\n',
-        r'---\s*---',
-        r'💡.*?create support ticket.*',
-        r'Need more help\?.*'
-    ]
-    
-    import re
-    for pattern in patterns_to_remove:
-        cleaned = re.sub(pattern, ' ', cleaned, flags=re.IGNORECASE | re.DOTALL)
+    cleaned = _REMOVAL_RE.sub(' ', cleaned)
     
     # Clean up whitespace
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = _WS_RE.sub(' ', cleaned).strip()
     
     return cleaned
 
 class SimpleChatbotEvaluator:
-    def __init__(self, dataset_path: str, output_dir: str = "evaluation_results"):
+    def __init__(self, dataset_path: str, output_dir: str = "evaluation_results", max_workers: int = 8):
         self.dataset_path = dataset_path
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.max_workers = max_workers
         
         # Load test dataset
         self.test_data = self._load_dataset()
@@ -147,8 +187,7 @@ class SimpleChatbotEvaluator:
     def _load_dataset(self) -> List[Dict]:
         """Load the evaluation dataset."""
         try:
-            with open(self.dataset_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _read_json(self.dataset_path)
         except Exception as e:
             print(f"❌ Error loading dataset: {e}")
             sys.exit(1)
@@ -182,56 +221,72 @@ class SimpleChatbotEvaluator:
         return self.results
 
     def _generate_responses(self):
-        """Generate responses for all test questions."""
-        generated_responses = []
-        
-        for i, test_case in enumerate(self.test_data, 1):
-            question = test_case['question']
-            print(f"   Generating response {i}/{len(self.test_data)}: {question[:50]}...")
-            
-            # Get response from chatbot
-            raw_response = get_chatbot_response(question)
-            
-            # Clean the response
-            clean_response_text = clean_response(raw_response)
-            
-            generated_responses.append({
-                'question': question,
-                'generated_response': clean_response_text,
-                'raw_response': raw_response,
-                'expected_answer': test_case['expected_answer'],
-                'category': test_case['category'],
-                'test_id': test_case['id']
-            })
-            
-            # Small delay
-            time.sleep(0.2)
+        """Generate responses for all test questions, several requests in flight at once."""
+        total = len(self.test_data)
+        generated_responses = [None] * total
+        
+        # Requests are I/O-bound, so threads overlap the backend round-trips
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._process_one, test_case, i, total): i
+                for i, test_case in enumerate(self.test_data)
+            }
+            for future in as_completed(futures):
+                generated_responses[futures[future]] = future.result()
         
         self.results['responses'] = generated_responses
         print(f"   ✅ Generated {len(generated_responses)} responses")
 
+    def _process_one(self, test_case: Dict, i: int, total: int) -> Dict[str, Any]:
+        """Fetch and clean the chatbot response for one test case."""
+        question = test_case['question']
+        print(f"   Generating response {i + 1}/{total}: {question[:50]}...")
+        
+        # Get response from chatbot
+        raw_response = get_chatbot_response(question)
+        
+        # Clean the response
+        clean_response_text = clean_response(raw_response)
+        
+        return {
+            'question': question,
+            'generated_response': clean_response_text,
+            'raw_response': raw_response,
+            'expected_answer': test_case['expected_answer'],
+            'category': test_case['category'],
+            'test_id': test_case['id']
+        }
+
     def _calculate_scores(self):
         """Calculate similarity and BLEU scores for all responses."""
         print("   📈 Computing similarity and BLEU scores...")
         
-        similarity_scores = []
-        bleu_scores = []
+        import numpy as np
         
-        for response_data in self.results['responses']:
-            generated = response_data['generated_response']
-            reference = response_data['expected_answer']
+        responses = self.results['responses']
+        n = len(responses)
+        similarity_scores = np.empty(n, dtype=np.float64)
+        bleu_scores = np.empty(n, dtype=np.float64)
+        
+        for i, response_data in enumerate(responses):
+            # Tokenize each side once and feed both scorers
+            generated_tokens = tokenize(response_data['generated_response'])
+            reference_tokens = tokenize(response_data['expected_answer'])
             
             # Calculate simple similarity score
-            similarity = calculate_simple_similarity(generated, reference)
-            similarity_scores.append(round(similarity, 4))
+            similarity_scores[i] = calculate_simple_similarity(frozenset(generated_tokens), frozenset(reference_tokens))
             
             # Calculate simple BLEU score
-            bleu = calculate_bleu_simple(generated, reference)
-            bleu_scores.append(round(bleu, 4))
-            
-            # Add to response data
-            response_data['similarity_score'] = round(similarity, 4)
-            response_data['bleu_score'] = round(bleu, 4)
+            bleu_scores[i] = calculate_bleu_simple(generated_tokens, reference_tokens)
+        
+        # Round once, vectorised, then hand plain floats to the results
+        similarity_scores = similarity_scores.round(4).tolist()
+        bleu_scores = bleu_scores.round(4).tolist()
+        
+        # Add to response data
+        for response_data, similarity, bleu in zip(responses, similarity_scores, bleu_scores):
+            response_data['similarity_score'] = similarity
+            response_data['bleu_score'] = bleu
         
         self.results['similarity_scores'] = similarity_scores
         self.results['bleu_scores'] = bleu_scores
@@ -241,31 +296,24 @@ class SimpleChatbotEvaluator:
         """Analyze results by question category."""
         print("   🔍 Analyzing performance by category...")
         
-        categories = {}
-        
+        # One pass: (similarity scores, BLEU scores) per category
+        buckets = defaultdict(lambda: ([], []))
         for response_data in self.results['responses']:
-            category = response_data['category']
-            
-            if category not in categories:
-                categories[category] = {
-                    'count': 0,
-                    'similarity_scores': [],
-                    'bleu_scores': []
-                }
-            
-            categories[category]['count'] += 1
-            categories[category]['similarity_scores'].append(response_data['similarity_score'])
-            categories[category]['bleu_scores'].append(response_data['bleu_score'])
+            sims, bleus = buckets[response_data['category']]
+            sims.append(response_data['similarity_score'])
+            bleus.append(response_data['bleu_score'])
         
         # Calculate category statistics
         category_stats = {}
-        for category, data in categories.items():
+        for category, (sims, bleus) in buckets.items():
+            sim_mean, sim_std, _, _ = _describe(sims)
+            bleu_mean, bleu_std, _, _ = _describe(bleus)
             category_stats[category] = {
-                'count': data['count'],
-                'avg_similarity': round(statistics.mean(data['similarity_scores']), 4),
-                'avg_bleu': round(statistics.mean(data['bleu_scores']), 4),
-                'similarity_std': round(statistics.stdev(data['similarity_scores']) if len(data['similarity_scores']) > 1 else 0, 4),
-                'bleu_std': round(statistics.stdev(data['bleu_scores']) if len(data['bleu_scores']) > 1 else 0, 4)
+                'count': len(sims),
+                'avg_similarity': round(sim_mean, 4),
+                'avg_bleu': round(bleu_mean, 4),
+                'similarity_std': round(sim_std, 4),
+                'bleu_std': round(bleu_std, 4)
             }
         
         self.results['category_stats'] = category_stats
@@ -275,22 +323,23 @@ class SimpleChatbotEvaluator:
         """Calculate overall performance statistics."""
         print("   📈 Computing overall statistics...")
         
-        similarity_scores = [r['similarity_score'] for r in self.results['responses']]
-        bleu_scores = [r['bleu_score'] for r in self.results['responses']]
+        responses = self.results['responses']
+        sim_mean, sim_std, sim_min, sim_max = _describe([r['similarity_score'] for r in responses])
+        bleu_mean, bleu_std, bleu_min, bleu_max = _describe([r['bleu_score'] for r in responses])
         
         self.results['overall_stats'] = {
-            'total_tests': len(self.results['responses']),
+            'total_tests': len(responses),
             'similarity_scores': {
-                'average': round(statistics.mean(similarity_scores), 4),
-                'std': round(statistics.stdev(similarity_scores) if len(similarity_scores) > 1 else 0, 4),
-                'min': round(min(similarity_scores), 4),
-                'max': round(max(similarity_scores), 4)
+                'average': round(sim_mean, 4),
+                'std': round(sim_std, 4),
+                'min': round(sim_min, 4),
+                'max': round(sim_max, 4)
             },
             'bleu_scores': {
-                'average': round(statistics.mean(bleu_scores), 4),
-                'std': round(statistics.stdev(bleu_scores) if len(bleu_scores) > 1 else 0, 4),
-                'min': round(min(bleu_scores), 4),
-                'max': round(max(bleu_scores), 4)
+                'average': round(bleu_mean, 4),
+                'std': round(bleu_std, 4),
+                'min': round(bleu_min, 4),
+                'max': round(bleu_max, 4)
             }
         }
         
@@ -298,26 +347,31 @@ class SimpleChatbotEvaluator:
 
     def _generate_report(self):
         """Generate comprehensive evaluation report."""
-        report_content = self._create_text_report()
-        
-        # Save text report
         report_file = self.output_dir / "evaluation_report.txt"
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write(report_content)
-        
-        # Save detailed results as JSON
         results_file = self.output_dir / "detailed_results.json"
-        with open(results_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        
+        # Save text report and detailed results as JSON side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            writes = [
+                executor.submit(self._write_text_report, report_file),
+                executor.submit(_write_json, results_file, self.results)
+            ]
+            for write in writes:
+                write.result()  # Re-raise any write error here
         
         print(f"   📄 Report saved to: {report_file}")
         print(f"   📊 Detailed results: {results_file}")
 
+    def _write_text_report(self, report_file: Path):
+        """Render the text report and write it to disk."""
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(self._create_text_report())
+
     def _create_text_report(self) -> str:
         """Create formatted text report."""
         stats = self.results['overall_stats']
         
-        report = f"""
+        parts = [f"""
 {'=' * 80}
 INGRES AI CHATBOT EVALUATION REPORT (SIMPLIFIED)
 {'=' * 80}
@@ -339,47 +393,47 @@ BLEU-style Score:
 
 📈 PERFORMANCE BY CATEGORY
 ---------------------------
-"""
+"""]
         
         # Add category breakdown
         for category, cat_stats in sorted(self.results['category_stats'].items()):
-            report += f"""
+            parts.append(f"""
 {category.upper()} ({cat_stats['count']} tests):
   • Similarity:   {cat_stats['avg_similarity']:.4f} ± {cat_stats['similarity_std']:.4f}
   • BLEU:         {cat_stats['avg_bleu']:.4f} ± {cat_stats['bleu_std']:.4f}
-"""
+""")
         
         # Add performance interpretation
         sim_avg = stats['similarity_scores']['average']
         bleu_avg = stats['bleu_scores']['average']
         
-        report += f"""
+        parts.append(f"""
 🏆 PERFORMANCE ASSESSMENT
 -------------------------
 Word Overlap Similarity ({sim_avg:.4f}):
-"""
+""")
         
         if sim_avg >= 0.60:
-            report += "  🟢 GOOD - High word overlap with expected answers\n"
+            parts.append("  🟢 GOOD - High word overlap with expected answers\n")
         elif sim_avg >= 0.40:
-            report += "  🟡 FAIR - Moderate word overlap\n"
+            parts.append("  🟡 FAIR - Moderate word overlap\n")
         else:
-            report += "  🔴 NEEDS IMPROVEMENT - Low word overlap\n"
+            parts.append("  🔴 NEEDS IMPROVEMENT - Low word overlap\n")
         
-        report += f"""
+        parts.append(f"""
 BLEU Score ({bleu_avg:.4f}):
-"""
+""")
         
         if bleu_avg >= 0.50:
-            report += "  🟢 GOOD - High lexical precision\n"
+            parts.append("  🟢 GOOD - High lexical precision\n")
         elif bleu_avg >= 0.30:
-            report += "  🟡 FAIR - Moderate lexical precision\n"
+            parts.append("  🟡 FAIR - Moderate lexical precision\n")
         else:
-            report += "  🔴 NEEDS IMPROVEMENT - Low lexical precision\n"
+            parts.append("  🔴 NEEDS IMPROVEMENT - Low lexical precision\n")
         
         # Add sample responses
-        report += "\n📝 SAMPLE RESPONSE COMPARISONS\n"
-        report += "=" * 50 + "\n"
+        parts.append("\n📝 SAMPLE RESPONSE COMPARISONS\n")
+        parts.append("=" * 50 + "\n")
         
         # Show best and worst performing examples
         responses_with_scores = [
@@ -389,27 +443,27 @@ BLEU Score ({bleu_avg:.4f}):
         
         # Best performance
         best_response = responses_with_scores[0][0]
-        report += f"""
+        parts.append(f"""
 🥇 BEST PERFORMANCE (Similarity: {best_response['similarity_score']:.4f})
 Question: {best_response['question']}
 
 Expected: {best_response['expected_answer'][:200]}...
 
 Generated: {best_response['generated_response'][:200]}...
-"""
+""")
         
         # Worst performance
         worst_response = responses_with_scores[-1][0]
-        report += f"""
+        parts.append(f"""
 🥉 NEEDS IMPROVEMENT (Similarity: {worst_response['similarity_score']:.4f})
 Question: {worst_response['question']}
 
 Expected: {worst_response['expected_answer'][:200]}...
 
 Generated: {worst_response['generated_response'][:200]}...
-"""
+""")
         
-        report += f"""
+        parts.append(f"""
 {'=' * 80}
 NOTE: This is a simplified evaluation using basic word overlap metrics.
 For more advanced BERT scoring, resolve the dependency conflicts.
@@ -417,9 +471,9 @@ For more advanced BERT scoring, resolve the dependency conflicts.
 EVALUATION COMPLETE
 Files generated in: {self.output_dir}
 {'=' * 80}
-"""
+""")
         
-        return report
+        return ''.join(parts)
 
 def main():
     """Main evaluation function."""
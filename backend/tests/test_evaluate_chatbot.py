@@ -0,0 +1,102 @@
+# test_evaluate_chatbot.py
+"""
+Tests for the BERTScore OOM backoff in evaluate_chatbot.
+"""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("sacrebleu")
+pytest.importorskip("nltk")
+pytest.importorskip("faiss")
+
+import evaluate_chatbot
+from evaluate_chatbot import ChatbotEvaluator
+
+
+class FakeScorer:
+    """Records the batch size of every score() call, raising OOM above fits_at."""
+
+    def __init__(self, batch_size, fits_at):
+        self.batch_size = batch_size
+        self.fits_at = fits_at
+        self.calls = []
+
+    def score(self, cands, refs, batch_size=64):
+        self.calls.append(batch_size)
+        if batch_size > self.fits_at:
+            raise torch.cuda.OutOfMemoryError("CUDA out of memory")
+        return "scores"
+
+
+def test_backoff_halves_batch_size_passed_to_score(monkeypatch):
+    scorer = FakeScorer(batch_size=64, fits_at=8)
+    monkeypatch.setattr(evaluate_chatbot, "_get_bert_scorer", lambda device=None: scorer)
+    monkeypatch.setattr(torch.cuda, "empty_cache", lambda: None)
+
+    evaluator = object.__new__(ChatbotEvaluator)
+    assert evaluator._score_with_backoff(["a"], ["b"]) == "scores"
+    assert scorer.calls == [64, 32, 16, 8]
+
+
+def test_backoff_falls_back_to_cpu_at_batch_size_one(monkeypatch):
+    gpu = FakeScorer(batch_size=2, fits_at=0)
+    cpu = FakeScorer(batch_size=64, fits_at=64)
+    monkeypatch.setattr(evaluate_chatbot, "_get_bert_scorer", lambda device=None: cpu if device == "cpu" else gpu)
+    monkeypatch.setattr(torch.cuda, "empty_cache", lambda: None)
+
+    evaluator = object.__new__(ChatbotEvaluator)
+    assert evaluator._score_with_backoff(["a"], ["b"]) == "scores"
+    assert gpu.calls == [2, 1]
+    assert cpu.calls == [64]
+
+
+class FakePipeline:
+    """Answers from a dict; questions starting with 'fail' get a fallback reply."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_answer(self, question, session_id=None):
+        self.calls.append(question)
+        if question.startswith("fail"):
+            return "Here’s what the INGRES documentation says:", [], True
+        return f"answer to {question}", [], False
+
+
+def _evaluator(tmp_path, use_cache=True):
+    evaluator = object.__new__(ChatbotEvaluator)
+    evaluator.rag_pipeline = FakePipeline()
+    evaluator.response_formatter = evaluate_chatbot.ResponseFormatter()
+    evaluator.cache = evaluate_chatbot.EvaluationCache(tmp_path / "responses.sqlite")
+    evaluator.pipeline_version = "test"
+    evaluator.max_concurrency = 4
+    evaluator.use_cache = use_cache
+    evaluator.results = {}
+    evaluator.test_data = [
+        {'id': i, 'question': q, 'expected_answer': 'x', 'category': 'c'}
+        for i, q in enumerate(["ok one", "fail two"])
+    ]
+    return evaluator
+
+
+def test_fallback_responses_are_not_cached(tmp_path):
+    import asyncio
+
+    evaluator = _evaluator(tmp_path)
+    asyncio.run(evaluator._generate_responses())
+    assert sorted(evaluator.rag_pipeline.calls) == ["fail two", "ok one"]
+
+    evaluator.rag_pipeline = FakePipeline()
+    asyncio.run(evaluator._generate_responses())
+    assert evaluator.rag_pipeline.calls == ["fail two"]
+
+
+def test_use_cache_off_regenerates_everything(tmp_path):
+    import asyncio
+
+    asyncio.run(_evaluator(tmp_path)._generate_responses())
+
+    evaluator = _evaluator(tmp_path, use_cache=False)
+    asyncio.run(evaluator._generate_responses())
+    assert sorted(evaluator.rag_pipeline.calls) == ["fail two", "ok one"]
@@ -0,0 +1,88 @@
+# test_response_formatter.py
+"""
+Regression tests for ResponseFormatter's fused removal pass.
+The removal patterns run as one alternation, so each match is taken against the
+original text; removing one pattern no longer joins lines for the next one.
+"""
+
+import time
+
+import pytest
+from response_formatter import ResponseFormatter
+
+@pytest.fixture
+def formatter():
+    return ResponseFormatter()
+
+def test_sample_response(formatter):
+    messy = """
+    Based on the INGRES documentation, here's what I found:
+
+    **1. Connection Documentation**
+    Title: INGRES Connection Guide
+    To connect to an INGRES database, you need to use the INGRES CONNECT statement...
+
+    ---
+
+    **2. Port Configuration**
+    Source: admin_guide.pdf
+    The default port for INGRES database connections is 21064...
+
+    💡 **Need more help?** Try asking more specific questions or type 'create support ticket'
+    """
+    assert formatter.clean_response(messy) == (
+        "To connect to an INGRES database, you need to use the INGRES CONNECT statement. "
+        "The default port for INGRES database connections is 21064."
+    )
+
+def test_source_line_does_not_merge_into_ticket_prompt(formatter):
+    # Sequential subs used to join these two lines and then drop the whole answer
+    text = "To configure the server you edit the config file carefully. Source: admin.pdf\nType create support ticket if stuck"
+    assert formatter.clean_response(text) == "To configure the server you edit the config file carefully."
+
+def test_ticket_prompt_line_removed(formatter):
+    text = "Check the errlog file for details about the failure now.\n\n💡 **Need more help?** Try 'create support ticket'\n"
+    assert formatter.clean_response(text) == "Check the errlog file for details about the failure now."
+
+def test_metadata_and_chunk_markers_removed(formatter):
+    text = (
+        "You can restart the daemon with the ingstop command safely.\n"
+        "Title: Guide\n"
+        "chunk 3 The default port for INGRES connections is 21064 always."
+    )
+    assert formatter.clean_response(text) == (
+        "You can restart the daemon with the ingstop command safely. "
+        "The default port for INGRES connections is 21064 always."
+    )
+
+def test_numbered_headings_and_separators_removed(formatter):
+    text = (
+        "**1. Setup**\nUse iisetup to install the instance on the host machine.\n"
+        "---\n---\nVerify the installation with the ingprenv command today."
+    )
+    assert formatter.clean_response(text) == (
+        "Use iisetup to install the instance on the host machine. "
+        "Verify the installation with the ingprenv command today."
+    )
+
+def test_duplicate_sentences_collapsed(formatter):
+    text = "Use the sql command to open a terminal session. Use the sql command to open a terminal session now!"
+    assert formatter.clean_response(text) == "Use the sql command to open a terminal session."
+
+def test_format_for_evaluation_strips_special_characters(formatter):
+    text = "The quick brown fox jumps over the lazy dog & friends #1 — really."
+    assert formatter.format_for_evaluation(text) == "The quick brown fox jumps over the lazy dog  friends 1  really."
+
+@pytest.mark.parametrize("response", ["", None, 42])
+def test_empty_or_non_string(formatter, response):
+    assert formatter.clean_response(response) == ""
+
+def test_meaningful_sentence_word_count(formatter):
+    assert formatter._is_meaningful_sentence("one two three four five")
+    assert not formatter._is_meaningful_sentence("one two three four")
+
+def test_meaningful_sentence_long_word_is_linear(formatter):
+    # A single five-word regex backtracked quadratically here (seconds for one sentence)
+    start = time.perf_counter()
+    assert not formatter._is_meaningful_sentence('a' * 16000 + ' b c d')
+    assert time.perf_counter() - start < 0.5